@@ -4,9 +4,65 @@
 import cv2
 import numpy as np
 import os
-import random
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# Numba 可选：装了就 JIT 编译填充内核，没装则退化为普通 NumPy 执行
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        def wrap(func):
+            return func
+        return wrap
+
+# PyTurboJPEG 可选：libjpeg-turbo 用 SIMD 做 DCT 和颜色转换，
+# 编码比 OpenCV 的 libjpeg 路径快数倍；没装或找不到动态库就用 imencode
+try:
+    from turbojpeg import TurboJPEG
+    _turbo = TurboJPEG()
+except Exception:
+    _turbo = None
+
+# 模块级随机数生成器（PCG64），避免每次调用重新初始化
+_rng = np.random.default_rng()
+
+# 随机红色色调候选（纯红色到偏橙红）
+RED_VARIATIONS = np.array([
+    [30, 30, 255],      # 纯红
+    [50, 50, 230],      # 深红
+    [40, 80, 255],      # 偏橙红
+    [20, 20, 200],      # 暗红
+    [60, 60, 255],      # 亮红
+], dtype=np.uint8)
+
+@njit(cache=True)
+def _fill_squares(img, squares):
+    """
+    把方块直接填进预分配的 uint8 图片缓冲区
+
+    squares 是 (k, 7) int32 数组，每行为 (y0, x0, sz, B, G, R, border)。
+    切片赋值由 Numba 编译成紧凑循环，绕开逐方块调用 cv2.rectangle
+    """
+    for i in range(squares.shape[0]):
+        y0, x0, sz = squares[i, 0], squares[i, 1], squares[i, 2]
+        for c in range(3):
+            img[y0:y0 + sz, x0:x0 + sz, c] = np.uint8(squares[i, 3 + c])
+
+        # border=1 时画 2 像素的深色内边框
+        if squares[i, 6] == 1:
+            for c in range(3):
+                v = squares[i, 3 + c] - 50
+                if v < 0:
+                    v = 0
+                dark = np.uint8(v)
+                img[y0:y0 + 2, x0:x0 + sz, c] = dark
+                img[y0 + sz - 2:y0 + sz, x0:x0 + sz, c] = dark
+                img[y0:y0 + sz, x0:x0 + 2, c] = dark
+                img[y0:y0 + sz, x0 + sz - 2:x0 + sz, c] = dark
+
 def generate_red_square_image(img_size=640, num_squares=None):
     """
     生成包含红色方块的图片
@@ -21,60 +77,189 @@ def generate_red_square_image(img_size=640, num_squares=None):
     """
     # 创建随机背景
     # 随机背景颜色（避免红色）
-    bg_color = [
-        random.randint(100, 255),  # B
-        random.randint(100, 255),  # G
-        random.randint(50, 150),   # R (避免红色背景)
-    ]
-    image = np.full((img_size, img_size, 3), bg_color, dtype=np.uint8)
-    
+    bg_color = np.array([
+        _rng.integers(100, 256),  # B
+        _rng.integers(100, 256),  # G
+        _rng.integers(50, 151),   # R (避免红色背景)
+    ], dtype=np.int16)
+
     # 添加一些噪点和纹理
-    noise = np.random.randint(-30, 30, (img_size, img_size, 3), dtype=np.int16)
-    image = np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
-    
+    # 直接在 int16 噪声上叠加背景色并原地裁剪，减少整幅图的内存读写次数
+    noise = _rng.integers(-30, 30, (img_size, img_size, 3), dtype=np.int16)
+    noise += bg_color
+    np.clip(noise, 0, 255, out=noise)
+    image = cv2.convertScaleAbs(noise)  # SIMD 加速的 int16→uint8 饱和转换
+
     # 随机方块数量
     if num_squares is None:
-        num_squares = random.randint(1, 3)
-    
-    labels = []
-    
-    for _ in range(num_squares):
-        # 随机方块尺寸（50-200像素）
-        square_size = random.randint(50, 200)
-        
-        # 随机位置（确保不超出边界）
-        x = random.randint(0, img_size - square_size)
-        y = random.randint(0, img_size - square_size)
-        
-        # 随机红色色调（纯红色到偏橙红）
-        red_variations = [
-            [30, 30, 255],      # 纯红
-            [50, 50, 230],      # 深红
-            [40, 80, 255],      # 偏橙红
-            [20, 20, 200],      # 暗红
-            [60, 60, 255],      # 亮红
-        ]
-        red_color = random.choice(red_variations)
-        
-        # 绘制方块
-        cv2.rectangle(image, (x, y), (x + square_size, y + square_size), red_color, -1)
-        
-        # 添加随机效果
-        if random.random() > 0.5:
-            # 添加边框
-            border_color = [c - 50 for c in red_color]
-            cv2.rectangle(image, (x, y), (x + square_size, y + square_size), border_color, 2)
-        
-        # 计算 YOLO 格式标注（归一化）
-        center_x = (x + square_size / 2) / img_size
-        center_y = (y + square_size / 2) / img_size
-        width = square_size / img_size
-        height = square_size / img_size
-        
-        labels.append([0, center_x, center_y, width, height])  # class_id=0 表示 red_square
-    
+        num_squares = int(_rng.integers(1, 4))
+
+    # 所有方块参数一次批量采样，省掉逐方块的标量 random 调用
+    sizes = _rng.integers(50, 201, num_squares)       # 方块尺寸（50-200像素）
+    xs = _rng.integers(0, img_size - sizes + 1)       # 随机位置（确保不超出边界）
+    ys = _rng.integers(0, img_size - sizes + 1)
+    color_idx = _rng.integers(0, len(RED_VARIATIONS), num_squares)
+    has_border = _rng.random(num_squares) > 0.5       # 一半方块带深色边框
+
+    squares = np.empty((num_squares, 7), dtype=np.int32)
+    squares[:, 0] = ys
+    squares[:, 1] = xs
+    squares[:, 2] = sizes
+    squares[:, 3:6] = RED_VARIATIONS[color_idx]
+    squares[:, 6] = has_border
+
+    # 一次性把所有方块填入图片缓冲区（Numba 编译的内核）
+    _fill_squares(image, squares)
+
+    # 计算 YOLO 格式标注（归一化），class_id=0 表示 red_square
+    centers_x = (xs + sizes / 2) / img_size
+    centers_y = (ys + sizes / 2) / img_size
+    whs = sizes / img_size
+    labels = [[0, cx, cy, wh, wh] for cx, cy, wh in zip(centers_x, centers_y, whs)]
+
     return image, labels
 
+def generate_red_square_batch(n, img_size=640, max_squares=3, rng=None):
+    """
+    批量生成包含红色方块的图片（一次生成 n 张）
+
+    把逐张生成的 Python 循环换成一个 (n, H, W, 3) 张量上的批量运算，
+    省去每张图片单独分配数组和调度 NumPy 内核的开销
+
+    参数:
+        n: 图片数量
+        img_size: 图片尺寸
+        max_squares: 每张图片的最大方块数量
+        rng: 随机数生成器（None 表示使用模块级 _rng）
+
+    返回:
+        images: (n, img_size, img_size, 3) uint8 图片张量
+        labels_list: 每张图片的 YOLO 格式标注列表
+    """
+    if rng is None:
+        rng = _rng
+    # 随机背景颜色（避免红色），形状 (n,1,1,3) 便于广播
+    bg_color = np.empty((n, 1, 1, 3), dtype=np.int16)
+    bg_color[..., 0] = rng.integers(100, 256, (n, 1, 1))  # B
+    bg_color[..., 1] = rng.integers(100, 256, (n, 1, 1))  # G
+    bg_color[..., 2] = rng.integers(50, 151, (n, 1, 1))   # R (避免红色背景)
+
+    # 一次性生成全部噪声并叠加背景色
+    images = rng.integers(-30, 30, (n, img_size, img_size, 3), dtype=np.int16)
+    images += bg_color
+    np.clip(images, 0, 255, out=images)
+    images = images.astype(np.uint8, copy=False)
+
+    # 批量采样方块参数：数量、尺寸、位置、颜色、边框，(n, max_squares) 一次采完
+    counts = rng.integers(1, max_squares + 1, n)
+    sizes = rng.integers(50, 201, (n, max_squares))
+    xs = rng.integers(0, img_size - sizes + 1)
+    ys = rng.integers(0, img_size - sizes + 1)
+    color_idx = rng.integers(0, len(RED_VARIATIONS), (n, max_squares))
+    has_border = rng.random((n, max_squares)) > 0.5
+    valid = np.arange(max_squares)[None, :] < counts[:, None]
+
+    # 坐标广播出 (n,H,W) 布尔掩码，按方块槽位批量填充
+    rows = np.arange(img_size)[None, :, None]
+    cols = np.arange(img_size)[None, None, :]
+    for k in range(max_squares):
+        x = xs[:, k, None, None]
+        y = ys[:, k, None, None]
+        s = sizes[:, k, None, None]
+        mask = ((rows >= y) & (rows < y + s) &
+                (cols >= x) & (cols < x + s) &
+                valid[:, k, None, None])
+        color = RED_VARIATIONS[color_idx[:, k]][:, None, None, :]
+        # np.copyto 按掩码原地写入，不像 np.where 那样每个槽位都复制整个张量
+        np.copyto(images, color, where=mask[..., None])
+
+        # 一半方块带 2 像素的深色边框
+        inner = ((rows >= y + 2) & (rows < y + s - 2) &
+                 (cols >= x + 2) & (cols < x + s - 2))
+        border_mask = mask & ~inner & has_border[:, k, None, None]
+        border_color = np.clip(color.astype(np.int16) - 50, 0, 255).astype(np.uint8)
+        np.copyto(images, border_color, where=border_mask[..., None])
+
+    # 计算 YOLO 格式标注（归一化）
+    labels_list = []
+    for i in range(n):
+        labels = []
+        for k in range(counts[i]):
+            s = sizes[i, k]
+            center_x = (xs[i, k] + s / 2) / img_size
+            center_y = (ys[i, k] + s / 2) / img_size
+            labels.append([0, center_x, center_y, s / img_size, s / img_size])
+        labels_list.append(labels)
+
+    return images, labels_list
+
+def _write_labels(label_path, labels):
+    """
+    把一张图片的全部标注一次性写入文件
+
+    先在内存中拼好整个文本块，再用一次 write 落盘，
+    避免逐行 f.write 带来的多次系统调用
+    """
+    block = '\n'.join(
+        f"{int(r[0])} {r[1]:.6f} {r[2]:.6f} {r[3]:.6f} {r[4]:.6f}" for r in labels
+    )
+    with open(label_path, 'wb') as f:
+        f.write((block + '\n').encode() if block else b'')
+
+def _write_jpeg(path, image, quality=90):
+    """
+    编码为 JPEG 后直接写入字节
+
+    cv2.imencode + write_bytes 跳过 cv2.imwrite 内部的文件名解析和
+    打开/关闭开销，还能显式控制 JPEG 质量；
+    装了 PyTurboJPEG 时优先走 libjpeg-turbo 的 SIMD 编码
+    """
+    if _turbo is not None:
+        # TurboJPEG 默认按 BGR 编码，和 OpenCV 的内存布局一致
+        Path(path).write_bytes(_turbo.encode(np.ascontiguousarray(image), quality=quality))
+        return
+
+    ok, buf = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    if not ok:
+        raise IOError(f"JPEG 编码失败: {path}")
+    Path(path).write_bytes(buf.tobytes())
+
+def _init_worker():
+    """
+    进程池子进程的初始化函数
+
+    并行交给进程池负责，子进程里把 OpenCV 和 OpenMP/MKL 都压到单线程，
+    避免进程 x 线程的过度订阅把并行收益抵消掉
+    """
+    cv2.setNumThreads(1)
+    os.environ['OMP_NUM_THREADS'] = '1'
+    os.environ['MKL_NUM_THREADS'] = '1'
+
+def _generate_chunk(args):
+    """
+    生成并写出一段连续编号的样本（进程池的工作函数）
+
+    必须是模块级函数才能被 pickle 发送到子进程。
+    每个任务带着主进程 SeedSequence.spawn 出来的独立子种子，
+    保证任何两个分块（包括 train/val 同编号的分块）随机流都不同
+
+    参数:
+        args: (split, start, count, img_size, seed) 元组
+    """
+    split, start, count, img_size, seed = args
+    rng = np.random.default_rng(seed)
+
+    images, labels_list = generate_red_square_batch(count, img_size, rng=rng)
+
+    base_dir = Path("dataset")
+    for i, (image, labels) in enumerate(zip(images, labels_list)):
+        idx = start + i
+        img_path = base_dir / 'images' / split / f'{split}_{idx:04d}.jpg'
+        _write_jpeg(img_path, image)
+        _write_labels(base_dir / 'labels' / split / f'{split}_{idx:04d}.txt', labels)
+
+    return count
+
 def save_dataset(num_train=200, num_val=50, img_size=640):
     """
     生成并保存完整数据集
@@ -93,58 +278,42 @@ def save_dataset(num_train=200, num_val=50, img_size=640):
         (base_dir / 'images' / split).mkdir(parents=True, exist_ok=True)
         (base_dir / 'labels' / split).mkdir(parents=True, exist_ok=True)
     
-    # 生成训练集
-    print(f"\n📦 生成训练集：{num_train} 张图片...")
-    for i in range(num_train):
-        # 生成图片和标注
-        image, labels = generate_red_square_image(img_size)
-        
-        # 保存图片
-        img_path = base_dir / 'images' / 'train' / f'train_{i:04d}.jpg'
-        cv2.imwrite(str(img_path), image)
-        
-        # 保存标注
-        label_path = base_dir / 'labels' / 'train' / f'train_{i:04d}.txt'
-        with open(label_path, 'w') as f:
-            for label in labels:
-                f.write(f"{label[0]} {label[1]:.6f} {label[2]:.6f} {label[3]:.6f} {label[4]:.6f}\n")
-        
-        if (i + 1) % 50 == 0:
-            print(f"  ✓ 已生成 {i + 1}/{num_train} 张")
-    
-    print(f"✅ 训练集完成！")
-    
-    # 生成验证集
-    print(f"\n📦 生成验证集：{num_val} 张图片...")
-    for i in range(num_val):
-        # 生成图片和标注
-        image, labels = generate_red_square_image(img_size)
-        
-        # 保存图片
-        img_path = base_dir / 'images' / 'val' / f'val_{i:04d}.jpg'
-        cv2.imwrite(str(img_path), image)
-        
-        # 保存标注
-        label_path = base_dir / 'labels' / 'val' / f'val_{i:04d}.txt'
-        with open(label_path, 'w') as f:
-            for label in labels:
-                f.write(f"{label[0]} {label[1]:.6f} {label[2]:.6f} {label[3]:.6f} {label[4]:.6f}\n")
-        
-        if (i + 1) % 20 == 0:
-            print(f"  ✓ 已生成 {i + 1}/{num_val} 张")
-    
-    print(f"✅ 验证集完成！")
-    
+    # 训练/验证集按块切分后分发到进程池并行生成
+    # 每个样本彼此独立，多核可以近线性加速
+    chunk = 16
+    tasks = [('train', s, min(chunk, num_train - s), img_size)
+             for s in range(0, num_train, chunk)]
+    tasks += [('val', s, min(chunk, num_val - s), img_size)
+              for s in range(0, num_val, chunk)]
+
+    # 每个分块派发一个独立的子种子，避免不同分块重放同一条随机流
+    seeds = np.random.SeedSequence().spawn(len(tasks))
+    tasks = [task + (seed,) for task, seed in zip(tasks, seeds)]
+
+    print(f"\n📦 生成训练集：{num_train} 张、验证集：{num_val} 张图片...")
+    print(f"   并行进程数: {os.cpu_count()}")
+
+    done = 0
+    total = num_train + num_val
+    with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                             initializer=_init_worker) as ex:
+        for count in ex.map(_generate_chunk, tasks):
+            done += count
+            if done % 50 < chunk:
+                print(f"  ✓ 已生成 {done}/{total} 张")
+
+    print(f"✅ 训练集和验证集完成！")
+
     # 生成一些测试图片
     print(f"\n📦 生成测试图片：5 张...")
     test_dir = Path('test_images')
     test_dir.mkdir(exist_ok=True)
-    
-    for i in range(5):
-        image, _ = generate_red_square_image(img_size)
+
+    images, _ = generate_red_square_batch(5, img_size)
+    for i, image in enumerate(images):
         test_path = test_dir / f'test_image_{i+1}.jpg'
-        cv2.imwrite(str(test_path), image)
-    
+        _write_jpeg(test_path, image)
+
     print(f"✅ 测试图片已保存到 test_images/ 目录！")
     
     # 统计信息
@@ -160,6 +329,18 @@ def save_dataset(num_train=200, num_val=50, img_size=640):
     print("  2. 或先查看生成的图片确认效果")
     print("=" * 60)
 
+def _draw_outline(image, x1, y1, x2, y2, color, thickness=2):
+    """
+    用四条切片赋值画空心矩形框
+
+    轴对齐的矩形框不需要 cv2.rectangle 的通用画线器，
+    四条 1 维切片存储就是 memset 级别的填充
+    """
+    image[y1:y1 + thickness, x1:x2] = color          # 上边
+    image[y2 - thickness:y2, x1:x2] = color          # 下边
+    image[y1:y2, x1:x1 + thickness] = color          # 左边
+    image[y1:y2, x2 - thickness:x2] = color          # 右边
+
 def preview_samples(num_samples=5):
     """
     预览生成的样本
@@ -182,7 +363,7 @@ def preview_samples(num_samples=5):
             x2 = int((cx + w/2) * 640)
             y2 = int((cy + h/2) * 640)
             
-            cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            _draw_outline(image, x1, y1, x2, y2, (0, 255, 0))
             cv2.putText(image, "red_square", (x1, y1-10), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
         
@@ -73,66 +73,66 @@ def main():
     # 查询方法：使用 model.names 字典，格式为 {id: 'name'}
     # 示例：model.names = {0: 'person', 1: 'bicycle', ..., 16: 'dog', ...}
     dog_class_id = 16
-    dog_count = 0
-    
+
     print("\n" + "=" * 50)
     print("🐕 检测到的狗的位置信息：")
     print("=" * 50)
-    
-    # 遍历所有检测结果
-    for box in result.boxes:
-        # 获取类别 ID
-        class_id = int(box.cls[0])
-        
-        # 只处理狗的检测结果
-        if class_id == dog_class_id:
-            dog_count += 1
-            
-            # 获取边界框坐标 (x1, y1, x2, y2)
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-            
-            # 获取置信度分数
-            confidence = float(box.conf[0])
-            
-            # 计算中心点坐标
-            center_x = (x1 + x2) / 2
-            center_y = (y1 + y2) / 2
-            
-            # 计算宽度和高度
-            width = x2 - x1
-            height = y2 - y1
-            
-            # 打印检测信息
-            print(f"\n狗 #{dog_count}:")
-            print(f"  📍 位置: ({int(x1)}, {int(y1)}) 到 ({int(x2)}, {int(y2)})")
-            print(f"  🎯 中心点: ({int(center_x)}, {int(center_y)})")
-            print(f"  📏 尺寸: 宽={int(width)}px, 高={int(height)}px")
-            print(f"  💯 置信度: {confidence:.2%}")
-            
-            # 在图片上绘制检测框（绿色，线宽3）
-            cv2.rectangle(image, 
-                         (int(x1), int(y1)), 
-                         (int(x2), int(y2)), 
-                         (0, 255, 0), 3)
-            
-            # 准备标签文本
-            label = f"Dog {confidence:.2%}"
-            
-            # 获取文本尺寸
-            (text_width, text_height), baseline = cv2.getTextSize(
-                label, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
-            
-            # 绘制标签背景（绿色矩形）
-            cv2.rectangle(image,
-                         (int(x1), int(y1) - text_height - 10),
-                         (int(x1) + text_width, int(y1)),
-                         (0, 255, 0), -1)
-            
-            # 绘制标签文本（白色）
-            cv2.putText(image, label,
-                       (int(x1), int(y1) - 5),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8,
-                       (255, 255, 255), 2)
+
+    # 一次性把全部检测结果搬回 CPU
+    # 逐框调用 box.xyxy[0].cpu().numpy() 会触发 N 次设备同步和拷贝，这里只需 3 次
+    xyxy = result.boxes.xyxy.cpu().numpy()
+    conf = result.boxes.conf.cpu().numpy()
+    cls = result.boxes.cls.cpu().numpy().astype(int)
+
+    # 只保留狗的检测结果
+    dog_mask = cls == dog_class_id
+    xyxy = xyxy[dog_mask]
+    conf = conf[dog_mask]
+    dog_count = len(xyxy)
+
+    # 向量化计算所有框的中心点和宽高
+    centers = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+    wh = xyxy[:, 2:] - xyxy[:, :2]
+
+    # 标签文本用固定宽度格式，尺寸只需在循环外量一次
+    # （字体和字号固定，逐框重复调用 getTextSize 是白费功夫）
+    (text_width, text_height), baseline = cv2.getTextSize(
+        "Dog 100.00%", cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+
+    # 只在打印和绘制时逐框遍历
+    for i in range(dog_count):
+        x1, y1, x2, y2 = xyxy[i]
+        confidence = float(conf[i])
+        center_x, center_y = centers[i]
+        width, height = wh[i]
+
+        # 打印检测信息
+        print(f"\n狗 #{i + 1}:")
+        print(f"  📍 位置: ({int(x1)}, {int(y1)}) 到 ({int(x2)}, {int(y2)})")
+        print(f"  🎯 中心点: ({int(center_x)}, {int(center_y)})")
+        print(f"  📏 尺寸: 宽={int(width)}px, 高={int(height)}px")
+        print(f"  💯 置信度: {confidence:.2%}")
+
+        # 在图片上绘制检测框（绿色，线宽3）
+        cv2.rectangle(image,
+                     (int(x1), int(y1)),
+                     (int(x2), int(y2)),
+                     (0, 255, 0), 3)
+
+        # 准备标签文本（固定宽度，和循环外量好的尺寸一致）
+        label = f"Dog {confidence:7.2%}"
+
+        # 绘制标签背景（绿色矩形）
+        cv2.rectangle(image,
+                     (int(x1), int(y1) - text_height - 10),
+                     (int(x1) + text_width, int(y1)),
+                     (0, 255, 0), -1)
+
+        # 绘制标签文本（白色）
+        cv2.putText(image, label,
+                   (int(x1), int(y1) - 5),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.8,
+                   (255, 255, 255), 2)
     
     # 输出检测总结
     print("\n" + "=" * 50)
@@ -1,29 +1,33 @@
 # 红色方块检测示例
 # 功能说明：使用 OpenCV 的颜色检测识别图片中红色方块的位置
-# 原理：通过 HSV 颜色空间识别红色区域，然后找出方块的轮廓和位置
+# 原理：通过 BGR 通道阈值识别红色区域，然后找出方块的轮廓和位置
 
 import cv2
 import numpy as np
 import os
 
-def detect_red_square(image_path, output_path="red_square_detected.png"):
+def detect_red_square(image_path, output_path="red_square_detected.png", verbose=False):
     """
     检测图片中的红色方块位置
-    
+
     参数:
         image_path: 输入图片路径
         output_path: 输出结果图片路径
+        verbose: 是否额外计算并打印轮廓顶点数（调试用）
     
     功能:
-        1. 读取图片并转换为 HSV 颜色空间
-        2. 通过颜色范围筛选出红色区域
+        1. 读取图片
+        2. 通过 BGR 通道阈值筛选出红色区域
         3. 查找红色区域的轮廓
         4. 绘制检测框并显示位置信息
         5. 保存结果图片
     """
     print("🎯 红色方块检测程序")
     print("=" * 50)
-    
+
+    # 单进程运行，放开 OpenCV 内部线程数用满所有核心
+    cv2.setNumThreads(os.cpu_count())
+
     # 检查图片文件是否存在
     if not os.path.exists(image_path):
         print(f"❌ 错误：找不到图片文件 '{image_path}'")
@@ -37,29 +41,24 @@ def detect_red_square(image_path, output_path="red_square_detected.png"):
         print(f"❌ 错误：无法读取图片 '{image_path}'")
         return
     
-    # 转换为 HSV 颜色空间
-    # HSV 比 RGB 更适合做颜色检测
-    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-    
-    # 定义红色的 HSV 范围
-    # 注意：红色在 HSV 色环上跨越 0 度，需要定义两个范围
-    # 范围1：0-10（偏橙红）
-    lower_red1 = np.array([0, 100, 100])
-    upper_red1 = np.array([10, 255, 255])
-    
-    # 范围2：170-180（偏紫红）
-    lower_red2 = np.array([170, 100, 100])
-    upper_red2 = np.array([180, 255, 255])
-    
-    # 创建红色掩码
-    mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-    mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-    mask = cv2.bitwise_or(mask1, mask2)
+    # 直接在 BGR 通道上做阈值判断
+    # 红色方块的特征是 R 通道高、G/B 通道低，不需要先整图转换到 HSV
+    # （省掉一次全图颜色空间转换和两次 inRange）
+    b, g, r = image[..., 0], image[..., 1], image[..., 2]
+    mask = ((r > 150) & (g < 100) & (b < 100)).astype(np.uint8) * 255
     
     # 形态学操作：去除噪点和填充空洞
+    # OpenCL 可用时把掩码包成 UMat 走 T-API，两次 morphologyEx 都留在 GPU 上，
+    # 只有最终掩码拷回 CPU（findContours 仅支持 CPU 内存）
     kernel = np.ones((5, 5), np.uint8)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    if cv2.ocl.haveOpenCL():
+        u_mask = cv2.UMat(mask)
+        u_mask = cv2.morphologyEx(u_mask, cv2.MORPH_CLOSE, kernel)
+        u_mask = cv2.morphologyEx(u_mask, cv2.MORPH_OPEN, kernel)
+        mask = u_mask.get()
+    else:
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
     
     # 查找轮廓
     print("\n🔍 正在检测红色方块...")
@@ -91,17 +90,18 @@ def detect_red_square(image_path, output_path="red_square_detected.png"):
         center_x = x + w // 2
         center_y = y + h // 2
         
-        # 计算近似多边形（判断是否为方形）
-        epsilon = 0.04 * cv2.arcLength(contour, True)
-        approx = cv2.approxPolyDP(contour, epsilon, True)
-        
         # 打印检测信息
         print(f"\n红色方块 #{square_count}:")
         print(f"  📍 位置: ({x}, {y}) 到 ({x+w}, {y+h})")
         print(f"  🎯 中心点: ({center_x}, {center_y})")
         print(f"  📏 尺寸: 宽={w}px, 高={h}px")
         print(f"  📐 面积: {int(area)} 平方像素")
-        print(f"  🔷 顶点数: {len(approx)}")
+
+        # 多边形近似只是调试信息，流程不依赖顶点数，默认跳过这两个 O(n) 调用
+        if verbose:
+            epsilon = 0.04 * cv2.arcLength(contour, True)
+            approx = cv2.approxPolyDP(contour, epsilon, True)
+            print(f"  🔷 顶点数: {len(approx)}")
         
         # 在图片上绘制检测框（红色，线宽3）
         cv2.rectangle(result_image, (x, y), (x+w, y+h), (0, 0, 255), 3)
@@ -144,7 +144,7 @@ def detect_red_square(image_path, output_path="red_square_detected.png"):
         print("❌ 未检测到红色方块")
         print("\n💡 提示：")
         print("   - 请确保图片中有明显的红色物体")
-        print("   - 可以调整 HSV 颜色范围参数")
+        print("   - 可以调整 BGR 阈值参数")
         print("   - 可以调整最小面积阈值")
     
     print("=" * 50)
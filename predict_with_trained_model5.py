@@ -3,6 +3,7 @@
 
 from ultralytics import YOLO
 import cv2
+import numpy as np
 import os
 from pathlib import Path
 
@@ -57,29 +58,53 @@ def predict_single_image(model_path, image_path, save_dir="predictions"):
             print("❌ 未检测到红色方块")
         else:
             print(f"✅ 检测到 {len(result.boxes)} 个红色方块\n")
-            
-            for j, box in enumerate(result.boxes, 1):
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                conf = float(box.conf[0])
-                cls = int(box.cls[0])
-                class_name = model.names[cls]
-                
-                # 计算中心点
-                center_x = int((x1 + x2) / 2)
-                center_y = int((y1 + y2) / 2)
-                width = int(x2 - x1)
-                height = int(y2 - y1)
-                
-                print(f"方块 #{j}:")
+
+            # 一次性把全部检测结果搬回 CPU，避免逐框的设备同步和拷贝
+            xyxy = result.boxes.xyxy.cpu().numpy()
+            confs = result.boxes.conf.cpu().numpy()
+            clss = result.boxes.cls.cpu().numpy().astype(int)
+
+            # 向量化计算所有框的中心点和宽高
+            centers = ((xyxy[:, :2] + xyxy[:, 2:]) / 2).astype(int)
+            whs = (xyxy[:, 2:] - xyxy[:, :2]).astype(int)
+
+            for j in range(len(xyxy)):
+                x1, y1, x2, y2 = xyxy[j]
+                class_name = model.names[int(clss[j])]
+
+                print(f"方块 #{j + 1}:")
                 print(f"  📍 位置: ({int(x1)}, {int(y1)}) 到 ({int(x2)}, {int(y2)})")
-                print(f"  🎯 中心点: ({center_x}, {center_y})")
-                print(f"  📏 尺寸: 宽={width}px, 高={height}px")
-                print(f"  💯 置信度: {conf:.2%}")
+                print(f"  🎯 中心点: ({centers[j, 0]}, {centers[j, 1]})")
+                print(f"  📏 尺寸: 宽={whs[j, 0]}px, 高={whs[j, 1]}px")
+                print(f"  💯 置信度: {float(confs[j]):.2%}")
                 print(f"  🏷️  类别: {class_name}\n")
         
         print(f"💾 结果已保存: {save_path}")
         print("=" * 60)
 
+def _save_annotated(result, save_path):
+    """
+    在结果缓存的原图上画框并一次编码落盘
+
+    result.save 会重新读取源图片、重建覆盖层再编码；
+    批量推理后原图已在 result.orig_img 里，直接复用它省掉整条重建流水线
+    """
+    img = result.orig_img.copy()
+
+    # 一次性取回全部框坐标和置信度
+    xyxy = result.boxes.xyxy.cpu().numpy().astype(int)
+    confs = result.boxes.conf.cpu().numpy()
+
+    for (x1, y1, x2, y2), conf in zip(xyxy, confs):
+        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 0, 255), 3)
+        cv2.putText(img, f"{float(conf):.2%}", (x1, max(y1 - 5, 0)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+    ok, buf = cv2.imencode(Path(save_path).suffix, img)
+    if not ok:
+        raise IOError(f"图片编码失败: {save_path}")
+    Path(save_path).write_bytes(buf.tobytes())
+
 def predict_batch_images(model_path, images_dir, save_dir="predictions"):
     """
     批量预测多张图片
@@ -99,13 +124,14 @@ def predict_batch_images(model_path, images_dir, save_dir="predictions"):
         return
     
     # 获取所有图片文件
-    image_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
-    image_files = []
-    
-    for ext in image_extensions:
-        image_files.extend(Path(images_dir).glob(f'*{ext}'))
-        image_files.extend(Path(images_dir).glob(f'*{ext.upper()}'))
-    
+    # 一次 iterdir 扫描目录，按后缀过滤（lower() 顺便解决大小写问题），
+    # 免去逐个扩展名 glob 的重复 readdir
+    image_extensions = {'.jpg', '.jpeg', '.png', '.bmp'}
+    image_files = sorted(
+        p for p in Path(images_dir).iterdir()
+        if p.suffix.lower() in image_extensions
+    )
+
     if not image_files:
         print(f"❌ 错误：在 '{images_dir}' 中未找到图片文件")
         return
@@ -121,27 +147,28 @@ def predict_batch_images(model_path, images_dir, save_dir="predictions"):
     Path(save_dir).mkdir(exist_ok=True)
     
     # 批量预测
+    # 把全部图片路径一次性交给模型，单次前向传播处理整批，
+    # 免去逐张调用时重复进入预处理/后处理流水线的开销
     print("\n🔍 开始批量检测...")
     total_detections = 0
-    
-    for i, image_file in enumerate(image_files, 1):
+
+    image_paths = [str(f) for f in image_files]
+    results = model(image_paths, conf=0.25, batch=min(32, len(image_paths)))
+
+    # 保存结果
+    for i, (image_file, result) in enumerate(zip(image_files, results), 1):
         print(f"\n[{i}/{len(image_files)}] 处理: {image_file.name}")
-        
-        # 预测
-        results = model(str(image_file), conf=0.25)
-        
-        # 保存结果
-        for result in results:
-            save_path = f"{save_dir}/{image_file.stem}_detected{image_file.suffix}"
-            result.save(filename=save_path)
-            
-            num_detections = len(result.boxes)
-            total_detections += num_detections
-            
-            if num_detections > 0:
-                print(f"  ✅ 检测到 {num_detections} 个方块")
-            else:
-                print(f"  ⚠️  未检测到方块")
+
+        save_path = f"{save_dir}/{image_file.stem}_detected{image_file.suffix}"
+        _save_annotated(result, save_path)
+
+        num_detections = len(result.boxes)
+        total_detections += num_detections
+
+        if num_detections > 0:
+            print(f"  ✅ 检测到 {num_detections} 个方块")
+        else:
+            print(f"  ⚠️  未检测到方块")
     
     # 输出统计
     print("\n" + "=" * 60)
@@ -151,26 +178,92 @@ def predict_batch_images(model_path, images_dir, save_dir="predictions"):
     print(f"  💾 结果保存: {save_dir}/")
     print("=" * 60)
 
-def predict_with_onnx(onnx_path, image_path):
+def _nms(boxes, scores, iou_threshold=0.45):
     """
-    使用 ONNX 模型进行预测（演示用）
-    
+    贪心非极大值抑制（纯 NumPy 实现）
+
+    参数:
+        boxes: (N, 4) xyxy 格式边界框
+        scores: (N,) 置信度
+        iou_threshold: IoU 阈值
+
+    返回:
+        保留框的索引列表
+    """
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+
+        # 计算当前框与剩余框的 IoU
+        xx1 = np.maximum(boxes[i, 0], boxes[order[1:], 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[order[1:], 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[order[1:], 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[order[1:], 3])
+        inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
+        iou = inter / (areas[i] + areas[order[1:]] - inter)
+
+        order = order[1:][iou <= iou_threshold]
+
+    return keep
+
+def predict_with_onnx(onnx_path, image_path, conf_threshold=0.25, img_size=640):
+    """
+    使用 ONNXRuntime 直接运行 ONNX 模型预测
+
+    跳过 PyTorch 的加载和构图开销，ONNXRuntime 启动更快，
+    CPU 上用 MLAS（AVX2/AVX-512）内核推理
+
     参数:
         onnx_path: ONNX 模型路径
         image_path: 输入图片路径
+        conf_threshold: 置信度阈值
+        img_size: 模型输入尺寸
     """
+    import onnxruntime as ort
+
     print(f"🎯 使用 ONNX 模型: {onnx_path}")
     print(f"📷 检测图片: {image_path}")
-    
+
     if not os.path.exists(onnx_path):
         print(f"❌ 错误：找不到 ONNX 模型 '{onnx_path}'")
         return
-    
-    # YOLO 也可以直接加载 ONNX 模型
-    model = YOLO(onnx_path)
-    results = model(image_path)
-    
-    print(f"✅ ONNX 模型预测完成！检测到 {len(results[0].boxes)} 个方块")
+
+    # 创建推理会话（优先 GPU，没有就用 CPU）
+    sess = ort.InferenceSession(
+        onnx_path, providers=['CUDAExecutionProvider', 'CPUExecutionProvider'])
+
+    # 预处理：缩放到模型输入尺寸，BGR→RGB，归一化，HWC→NCHW
+    image = cv2.imread(image_path)
+    h0, w0 = image.shape[:2]
+    resized = cv2.resize(image, (img_size, img_size))
+    blob = resized[..., ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+
+    # 推理：YOLO 检测头输出 (1, 4+类别数, 预测框数)
+    outputs = sess.run(None, {sess.get_inputs()[0].name: blob})[0]
+    preds = outputs[0].T  # -> (预测框数, 4+类别数)
+
+    # 按置信度过滤
+    scores = preds[:, 4:].max(axis=1)
+    mask = scores > conf_threshold
+    preds, scores = preds[mask], scores[mask]
+
+    # xywh → xyxy，并还原到原图坐标
+    xy, wh = preds[:, :2], preds[:, 2:4]
+    boxes = np.concatenate([xy - wh / 2, xy + wh / 2], axis=1)
+    boxes *= np.array([w0 / img_size, h0 / img_size] * 2, dtype=np.float32)
+
+    # 非极大值抑制去掉重叠框
+    keep = _nms(boxes, scores)
+
+    print(f"✅ ONNX 模型预测完成！检测到 {len(keep)} 个方块")
+    for j, i in enumerate(keep, 1):
+        x1, y1, x2, y2 = boxes[i]
+        print(f"  方块 #{j}: 置信度={float(scores[i]):.2%}, "
+              f"位置=({int(x1)},{int(y1)},{int(x2)},{int(y2)})")
 
 def main():
     """
@@ -4,6 +4,9 @@
 #   2. 修改 data.yaml 配置文件路径
 #   3. 运行此脚本开始训练
 
+import os
+
+import torch
 from ultralytics import YOLO
 
 def train_square_detector():
@@ -12,31 +15,42 @@ def train_square_detector():
     """
     print("🚀 开始训练自定义 YOLO 模型")
     print("=" * 50)
-    
+
     # 加载预训练模型（迁移学习，更快收敛）
     model = YOLO("yolo12n.pt")  # 使用 nano 版本，轻量快速
-    
+
+    # 有 CUDA 就用 GPU 训练（混合精度），否则退回 CPU
+    # 卷积训练是计算密集型，GPU + FP16 张量核带来的加速远超其他调优
+    device = 0 if torch.cuda.is_available() else 'cpu'
+    batch = 64 if device != 'cpu' else 16  # GPU 显存够就用大批次
+    print(f"🖥️  训练设备: {'GPU (CUDA)' if device != 'cpu' else 'CPU'}")
+
+    # 确定性训练会禁用 cuDNN 的算法自动调优，卷积往往慢 20-40%
+    # 需要完全复现实验时设置环境变量 REPRODUCIBLE=1
+    reproducible = bool(os.environ.get('REPRODUCIBLE'))
+
     # 开始训练
     results = model.train(
         data="data.yaml",           # 数据集配置文件
         epochs=20,                  # 训练轮数（减少到20轮，更快完成）
         imgsz=640,                  # 图片尺寸
-        batch=16,                   # 批次大小（根据显存调整）
+        batch=batch,                # 批次大小（根据显存调整）
         name="square_detector",     # 项目名称
-        device='cpu',               # 使用 CPU 训练
+        device=device,              # 自动选择 GPU/CPU
+        amp=True,                   # 混合精度训练（GPU 上启用 FP16）
         patience=50,                # 早停耐心值
         save=True,                  # 保存模型
         plots=True,                 # 生成训练图表
-        
+
         # 可选参数
-        workers=8,                  # 数据加载线程数
+        workers=min(8, os.cpu_count()),  # 数据加载线程数
         project="runs/train",       # 保存路径
         exist_ok=True,              # 允许覆盖
         pretrained=True,            # 使用预训练权重
         optimizer="auto",           # 优化器
         verbose=True,               # 详细输出
-        seed=0,                     # 随机种子
-        deterministic=True,         # 确定性训练
+        seed=0,                     # 随机种子（始终生效，与 deterministic 无关）
+        deterministic=reproducible, # 默认关闭，放开 cuDNN 自动调优
         
         # 数据增强参数
         hsv_h=0.015,               # 色调增强
@@ -58,24 +72,32 @@ def train_square_detector():
     print(f"📁 模型保存在: runs/train/square_detector/weights/best.pt")
     print(f"📊 训练结果: runs/train/square_detector/")
     
-    # 自动导出模型为多种格式
+    # 自动导出模型为多种格式（已有缓存就跳过，导出一次即可）
     print("\n📦 正在导出模型...")
     model_path = "runs/train/square_detector/weights/best.pt"
     export_model = YOLO(model_path)
-    
+
     # 导出为 ONNX 格式（通用格式，可用于多种部署场景）
-    try:
-        onnx_path = export_model.export(format='onnx')
-        print(f"✅ ONNX 模型: {onnx_path}")
-    except Exception as e:
-        print(f"⚠️ ONNX 导出失败: {e}")
-    
+    onnx_path = "runs/train/square_detector/weights/best.onnx"
+    if os.path.exists(onnx_path):
+        print(f"✅ ONNX 模型（缓存）: {onnx_path}")
+    else:
+        try:
+            onnx_path = export_model.export(format='onnx', dynamic=True)
+            print(f"✅ ONNX 模型: {onnx_path}")
+        except Exception as e:
+            print(f"⚠️ ONNX 导出失败: {e}")
+
     # 导出为 TorchScript 格式
-    try:
-        torchscript_path = export_model.export(format='torchscript')
-        print(f"✅ TorchScript 模型: {torchscript_path}")
-    except Exception as e:
-        print(f"⚠️ TorchScript 导出失败: {e}")
+    torchscript_path = "runs/train/square_detector/weights/best.torchscript"
+    if os.path.exists(torchscript_path):
+        print(f"✅ TorchScript 模型（缓存）: {torchscript_path}")
+    else:
+        try:
+            torchscript_path = export_model.export(format='torchscript')
+            print(f"✅ TorchScript 模型: {torchscript_path}")
+        except Exception as e:
+            print(f"⚠️ TorchScript 导出失败: {e}")
     
     print("\n💾 模型文件说明：")
     print("  - best.pt: PyTorch 模型（推荐，Python 中使用）")